@@ -3,6 +3,7 @@ import pandas as pd
 import time
 from datetime import datetime
 from pathlib import Path
+from snapshot import SessionOverlay, SnapshotStore
 from tools import (
     UIAgent,
     CommunicationAgent,
@@ -22,12 +23,48 @@ CANDIDATE_STAGES = [
     "Rejected"
 ]
 
-def refresh_data():
-    """Refresh all data from JSON files"""
+@st.cache_resource
+def get_snapshot_store():
+    """Share one parsed copy of the data files across all sessions"""
     data_dir = Path('data')
-    postings_data = DataAgent.perceive_data(data_dir / 'postings.json')
-    candidates_data = DataAgent.perceive_data(data_dir / 'candidates.json')
-    return postings_data, candidates_data
+    return SnapshotStore(
+        {
+            'postings': data_dir / 'postings.json',
+            'candidates': data_dir / 'candidates.json',
+        },
+        # Duplicates are merged for display only; the files keep every record
+        lambda path: DataAgent.perceive_data(path, deduplicate=True)
+    )
+
+def refresh_data(sync=False):
+    """Refresh all data from JSON files, returning the shared snapshot"""
+    data_dir = Path('data')
+    # Pull only changed candidates from any ATS exports dropped in data/exports
+    exports_dir = data_dir / 'exports'
+    if sync and exports_dir.exists():
+        st.session_state.sync_summary = DataAgent.synchronize_data(
+            data_dir / 'candidates.json',
+            exports_dir,
+            data_dir / 'sync_state.json',
+            data_dir / 'archive'
+        )
+    # Move closed and expired candidates out of the hot store before loading
+    if sync:
+        st.session_state.archive_summary = DataAgent.archive_data(
+            data_dir / 'candidates.json',
+            data_dir / 'archive'
+        )
+    # Files are only re-parsed when their mtime changes, once per process
+    return get_snapshot_store().current()
+
+@st.cache_resource
+def start_archive_compaction():
+    """Start the retention compaction job once per server process"""
+    data_dir = Path('data')
+    return DataAgent.start_compaction(
+        data_dir / 'candidates.json',
+        data_dir / 'archive'
+    )
 
 def main():
     # Apply custom CSS
@@ -37,17 +74,19 @@ def main():
     
     # Define data directory
     data_dir = Path('data')
+    start_archive_compaction()
     
-    # Initialize session state for data
-    if 'postings_data' not in st.session_state or 'candidates_data' not in st.session_state:
-        st.session_state.postings_data, st.session_state.candidates_data = refresh_data()
+    # Sessions share one snapshot; only their pending edits are kept per session
+    if 'overlay' not in st.session_state:
+        st.session_state.overlay = SessionOverlay()
+    snapshot = refresh_data()
     
     # Create tabs
     tab1, tab2 = st.tabs(["Candidate Assessment", "Applicant Tracking"])
     
-    # Load data from session state
-    postings_data = st.session_state.postings_data
-    candidates_data = st.session_state.candidates_data
+    # Load data from the shared snapshot
+    postings_data = snapshot.data.get('postings')
+    candidates_data = st.session_state.overlay.view(snapshot)
     
     if not postings_data or not candidates_data:
         st.error(
@@ -129,63 +168,66 @@ def main():
                 if WorkflowAgent.transition_candidate(
                     candidate_id, new_stage
                 ):
-                    # Refresh data after successful update
-                    st.session_state.postings_data, st.session_state.candidates_data = refresh_data()
+                    # Show the change in this session straight away; the shared
+                    # snapshot reloads it from disk for everyone on the next run
+                    edited = st.session_state.overlay.edit(snapshot, candidate_id)
+                    if edited is not None:
+                        edited['current_stage'] = new_stage
+                        edited['stage_history'] = edited.get('stage_history', [])
+                        edited['stage_history'].append({
+                            'stage': new_stage,
+                            'timestamp': datetime.now().isoformat(),
+                        })
+                    
+                    st.success(
+                        f"Successfully moved {candidate_details['name']} to "
+                        f"{new_stage} stage"
+                    )
                     
-                    # Save updated data using the refreshed data
-                    if DataAgent.persist_state(
-                        data_dir / 'candidates.json', 
-                        st.session_state.candidates_data
-                    ):
-                        st.success(
-                            f"Successfully moved {candidate_details['name']} to "
-                            f"{new_stage} stage"
+                    # Send appropriate notifications based on stage
+                    if new_stage == "Interview":
+                        # Send Calendly invite for interview stage
+                        if CommunicationAgent.coordinate_interview(
+                            candidate_details['emails'][0],
+                            candidate_details['name'],
+                            posting_details['text']
+                        ):
+                            st.success(
+                                "Calendly interview invite sent successfully"
+                            )
+                        else:
+                            st.warning("Failed to send Calendly interview invite")
+                    else:
+                        # Send regular status update email
+                        email_subject = (
+                            f"Application Status Update - "
+                            f"{posting_details['text']}"
                         )
+                        email_body = f"""
+                        <html>
+                        <body>
+                        <h2>Application Status Update</h2>
+                        <p>Dear {candidate_details['name']},</p>
+                        <p>Your application for the position of 
+                           <b>{posting_details['text']}</b> has been updated.</p>
+                        <p>Current Stage: <b>{new_stage}</b></p>
+                        <br>
+                        <p>Recruiter Comments:</p>
+                        <p>{comments}</p>
+                        <br>
+                        <p>Best regards,<br>Recruitment Team</p>
+                        </body>
+                        </html>
+                        """
                         
-                        # Send appropriate notifications based on stage
-                        if new_stage == "Interview":
-                            # Send Calendly invite for interview stage
-                            if CommunicationAgent.coordinate_interview(
-                                candidate_details['emails'][0],
-                                candidate_details['name'],
-                                posting_details['text']
-                            ):
-                                st.success(
-                                    "Calendly interview invite sent successfully"
-                                )
-                            else:
-                                st.warning("Failed to send Calendly interview invite")
+                        if CommunicationAgent.dispatch_message(
+                            candidate_details['emails'][0],
+                            email_subject,
+                            email_body
+                        ):
+                            st.success("Email notification sent successfully")
                         else:
-                            # Send regular status update email
-                            email_subject = (
-                                f"Application Status Update - "
-                                f"{posting_details['text']}"
-                            )
-                            email_body = f"""
-                            <html>
-                            <body>
-                            <h2>Application Status Update</h2>
-                            <p>Dear {candidate_details['name']},</p>
-                            <p>Your application for the position of 
-                               <b>{posting_details['text']}</b> has been updated.</p>
-                            <p>Current Stage: <b>{new_stage}</b></p>
-                            <br>
-                            <p>Recruiter Comments:</p>
-                            <p>{comments}</p>
-                            <br>
-                            <p>Best regards,<br>Recruitment Team</p>
-                            </body>
-                            </html>
-                            """
-                            
-                            if CommunicationAgent.dispatch_message(
-                                candidate_details['emails'][0],
-                                email_subject,
-                                email_body
-                            ):
-                                st.success("Email notification sent successfully")
-                            else:
-                                st.warning("Failed to send email notification")
+                            st.warning("Failed to send email notification")
                 else:
                     st.error("Failed to update candidate stage")
             
@@ -226,11 +268,34 @@ def main():
         
         # Add refresh button
         if st.button("Refresh Data"):
-            st.session_state.postings_data, st.session_state.candidates_data = refresh_data()
+            snapshot = refresh_data(sync=True)
             st.success("Data refreshed successfully!")
+            
+            summary = st.session_state.get('sync_summary')
+            if summary and summary['conflict']:
+                st.warning(
+                    "Candidate data changed during the export sync; "
+                    "refresh again to apply it"
+                )
+            elif summary and summary['chunks']:
+                st.info(
+                    f"Synced {summary['chunks']} export chunk(s): "
+                    f"{len(summary['inserted'])} new, "
+                    f"{len(summary['updated'])} updated, "
+                    f"{len(summary['archived_updated'])} archived updated, "
+                    f"{len(summary['restored'])} restored from archive, "
+                    f"{summary['skipped'] + summary['unchanged']} unchanged"
+                )
+            
+            archive_summary = st.session_state.get('archive_summary')
+            if archive_summary and archive_summary['archived']:
+                archived_count = sum(
+                    len(ids) for ids in archive_summary['archived'].values()
+                )
+                st.info(f"Archived {archived_count} closed candidate(s)")
         
         # Add filters
-        col1, col2 = st.columns(2)
+        col1, col2, col3 = st.columns(3)
         with col1:
             selected_job = st.selectbox(
                 "Filter by Job Posting",
@@ -243,9 +308,21 @@ def main():
                 options=["All"] + CANDIDATE_STAGES
             )
         
+        with col3:
+            include_archived = st.checkbox("Include archived")
+        
+        # Cold segments are only read when archived candidates are requested
+        candidates_data = st.session_state.overlay.view(snapshot)
+        tracking_candidates = list(candidates_data['candidates'])
+        if include_archived:
+            tracking_candidates.extend(DataAgent.perceive_archive(
+                data_dir / 'archive',
+                stage=None if selected_stage == "All" else selected_stage
+            ))
+        
         # Create a DataFrame for tracking using refreshed data
         tracking_data = []
-        for candidate in st.session_state.candidates_data['candidates']:
+        for candidate in tracking_candidates:
             tracking_data.append({
                 'Name': candidate['name'],
                 'Email': candidate['emails'][0],
@@ -290,7 +367,7 @@ def main():
         
         if selected_candidate_tracking:
             candidate_history = next(
-                (c['stage_history'] for c in st.session_state.candidates_data['candidates'] 
+                (c['stage_history'] for c in tracking_candidates 
                  if c['name'] == selected_candidate_tracking),
                 []
             )
@@ -0,0 +1,365 @@
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from storage import read_json_file, write_json_atomic, write_lock
+
+CLOSED_STAGES = ('Hired', 'Rejected')
+INDEX_FILE = 'index.json'
+COMPACTION_INTERVAL = 6 * 60 * 60
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _to_ms(value):
+    """Convert an epoch-ms number or ISO timestamp to epoch ms"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return int(datetime.fromisoformat(str(value)).timestamp() * 1000)
+    except ValueError:
+        return None
+
+
+def expires_at(candidate):
+    """Return the storage retention expiry in epoch ms, if any"""
+    protection = candidate.get('dataProtection') or {}
+    store = protection.get('store') or {}
+    return _to_ms(store.get('expiresAt'))
+
+
+def is_expired(candidate, now=None):
+    """Check whether the candidate's storage permission has lapsed"""
+    expiry = expires_at(candidate)
+    return expiry is not None and expiry <= (now or _now_ms())
+
+
+def is_closed(candidate):
+    """Check whether the candidate no longer has an active pipeline"""
+    return (
+        candidate.get('current_stage') in CLOSED_STAGES
+        or bool(candidate.get('archived'))
+    )
+
+
+def segment_key(candidate):
+    """Return the YYYY-MM segment a closed candidate is filed under"""
+    history = candidate.get('stage_history') or []
+    closed_at = None
+    if history:
+        closed_at = _to_ms(history[-1].get('timestamp'))
+    if closed_at is None:
+        closed_at = _to_ms(candidate.get('updatedAt')) or _now_ms()
+    return datetime.fromtimestamp(closed_at / 1000).strftime('%Y-%m')
+
+
+def load_index(archive_dir):
+    """Load the cold-store index, or an empty one"""
+    try:
+        with open(Path(archive_dir) / INDEX_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'segments': {}, 'candidates': {}, 'purged': {}}
+
+
+def read_segment(archive_dir, key):
+    """Read one compressed monthly segment"""
+    try:
+        with gzip.open(
+            Path(archive_dir) / f"{key}.json.gz", 'rt', encoding='utf-8'
+        ) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def write_segment(archive_dir, key, candidates):
+    """Write a compressed monthly segment, removing it when empty"""
+    segment_path = Path(archive_dir) / f"{key}.json.gz"
+    if not candidates:
+        segment_path.unlink(missing_ok=True)
+        return
+    temp_path = segment_path.with_name(f".{segment_path.name}.tmp")
+    with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+        json.dump(candidates, f, ensure_ascii=False)
+    os.replace(temp_path, segment_path)
+
+
+def _index_entry(candidate, key):
+    history = candidate.get('stage_history') or [{}]
+    return {
+        'segment': key,
+        'name': candidate.get('name'),
+        'stage': candidate.get('current_stage'),
+        'updated': history[-1].get('timestamp'),
+        'expiresAt': expires_at(candidate),
+        'merged_ids': candidate.get('merged_ids') or [],
+    }
+
+
+def _rebuild_segment_counts(index):
+    counts = {}
+    for entry in index['candidates'].values():
+        counts[entry['segment']] = counts.get(entry['segment'], 0) + 1
+    index['segments'] = {key: {'count': n} for key, n in sorted(counts.items())}
+
+
+def archive_candidates(candidates_file, archive_dir, now=None,
+                       expired_only=False):
+    """Move closed or expired candidates from the hot store to cold segments
+
+    With expired_only, only candidates past retention expiry are moved,
+    which is what the background job does so that closed candidates do
+    not disappear from a recruiter's view between refreshes. Returns a
+    summary with the ids moved per segment.
+    """
+    with write_lock:
+        return _archive_candidates(
+            candidates_file, archive_dir, now or _now_ms(), expired_only
+        )
+
+
+def _archive_candidates(candidates_file, archive_dir, now, expired_only):
+    """Partition the hot store; callers must hold write_lock"""
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+
+    read_mtime = os.stat(candidates_file).st_mtime_ns
+    store = read_json_file(candidates_file)
+    candidates = store['candidates'] if isinstance(store, dict) else store
+    hot, moving = [], {}
+    for candidate in candidates:
+        if is_expired(candidate, now) or (
+            not expired_only and is_closed(candidate)
+        ):
+            moving.setdefault(segment_key(candidate), []).append(candidate)
+        else:
+            hot.append(candidate)
+
+    summary = {'archived': {}, 'hot_count': len(hot)}
+    if not moving:
+        return summary
+
+    index = load_index(archive_dir)
+    # Kept so the cold writes can be undone if the hot store changes
+    original_index = json.loads(json.dumps(index))
+    original_segments = {}
+
+    def rewrite_segment(key, segment):
+        if key not in original_segments:
+            original_segments[key] = read_segment(archive_dir, key)
+        write_segment(archive_dir, key, segment)
+
+    for key, records in moving.items():
+        moved_ids = {c.get('id') for c in records}
+        segment = [
+            c for c in read_segment(archive_dir, key)
+            if c.get('id') not in moved_ids
+        ]
+        segment.extend(records)
+        rewrite_segment(key, segment)
+        for candidate in records:
+            # A re-archived candidate may have closed in another month
+            previous = index['candidates'].get(candidate.get('id'))
+            if previous and previous['segment'] != key:
+                old = [
+                    c for c in read_segment(archive_dir, previous['segment'])
+                    if c.get('id') != candidate.get('id')
+                ]
+                rewrite_segment(previous['segment'], old)
+            index['candidates'][candidate.get('id')] = _index_entry(
+                candidate, key
+            )
+        summary['archived'][key] = sorted(moved_ids, key=str)
+    _rebuild_segment_counts(index)
+    write_json_atomic(archive_dir / INDEX_FILE, index)
+
+    # In-process writers hold write_lock, but another process (a CLI run)
+    # may have written the hot store meanwhile. Checked right before the
+    # write; on a change the cold writes are undone and the move retried
+    # on the next run, so no edit is lost and nobody is in both stores.
+    if os.stat(candidates_file).st_mtime_ns != read_mtime:
+        for key, segment in original_segments.items():
+            write_segment(archive_dir, key, segment)
+        write_json_atomic(archive_dir / INDEX_FILE, original_index)
+        return {'archived': {}, 'hot_count': len(candidates)}
+
+    # Only shrink the hot store once the cold copy is safely written
+    if isinstance(store, dict):
+        store['candidates'] = hot
+    else:
+        store = {'candidates': hot}
+    write_json_atomic(candidates_file, store)
+    return summary
+
+
+def archived_ids(index):
+    """Map every archived id, including merged duplicate ids, to its owner"""
+    owners = {}
+    for candidate_id, entry in index['candidates'].items():
+        owners[candidate_id] = candidate_id
+        for merged_id in entry.get('merged_ids') or []:
+            owners.setdefault(merged_id, candidate_id)
+    return owners
+
+
+def update_archived(archive_dir, records, upsert, now=None):
+    """Apply updated export records to archived candidates in place
+
+    records maps an archived candidate id to the export records for it;
+    upsert(existing, record) returns the updated candidate. Only the
+    segments holding those candidates are rewritten. Returns the ids of
+    candidates that changed and stayed archived, and the updated records
+    that are neither closed nor expired any more. Those reopened records
+    are left untouched in the archive: the caller adds them to the hot
+    store and then calls remove_archived, so a failed hot write never
+    loses them.
+    """
+    now = now or _now_ms()
+    archive_dir = Path(archive_dir)
+    changed = []
+    reopened = []
+    with write_lock:
+        index = load_index(archive_dir)
+        segments = {}
+        for candidate_id in records:
+            entry = index['candidates'].get(candidate_id)
+            if entry:
+                segments.setdefault(entry['segment'], []).append(candidate_id)
+        for key, candidate_ids in segments.items():
+            segment = read_segment(archive_dir, key)
+            positions = {c.get('id'): i for i, c in enumerate(segment)}
+            for candidate_id in candidate_ids:
+                position = positions.get(candidate_id)
+                if position is None:
+                    continue
+                updated = segment[position]
+                for record in records[candidate_id]:
+                    updated = upsert(updated, record)
+                if updated == segment[position]:
+                    continue
+                if not is_closed(updated) and not is_expired(updated, now):
+                    reopened.append(updated)
+                    continue
+                segment[position] = updated
+                index['candidates'][candidate_id] = _index_entry(updated, key)
+                changed.append(candidate_id)
+            write_segment(archive_dir, key, segment)
+        if changed:
+            write_json_atomic(archive_dir / INDEX_FILE, index)
+    return changed, reopened
+
+
+def remove_archived(archive_dir, candidate_ids):
+    """Drop candidates from their cold segments and the index"""
+    archive_dir = Path(archive_dir)
+    with write_lock:
+        index = load_index(archive_dir)
+        segments = {}
+        for candidate_id in candidate_ids:
+            entry = index['candidates'].pop(candidate_id, None)
+            if entry:
+                segments.setdefault(entry['segment'], set()).add(candidate_id)
+        if not segments:
+            return
+        for key, ids in segments.items():
+            segment = [
+                c for c in read_segment(archive_dir, key)
+                if c.get('id') not in ids
+            ]
+            write_segment(archive_dir, key, segment)
+        _rebuild_segment_counts(index)
+        write_json_atomic(archive_dir / INDEX_FILE, index)
+
+
+def is_purged(index, candidate):
+    """Check whether an export record belongs to a purged candidate
+
+    A record carrying an expiry later than the purged one has had its
+    storage permission renewed and may be stored again.
+    """
+    purged_at = (index.get('purged') or {}).get(candidate.get('id'))
+    if purged_at is None:
+        return False
+    expiry = expires_at(candidate)
+    return expiry is None or expiry <= purged_at
+
+
+def load_archived(archive_dir, stage=None):
+    """Load archived candidates, opening only segments the index points to"""
+    index = load_index(archive_dir)
+    keys = {
+        entry['segment'] for entry in index['candidates'].values()
+        if stage is None or entry['stage'] == stage
+    }
+    candidates = []
+    for key in sorted(keys):
+        for candidate in read_segment(archive_dir, key):
+            if stage is None or candidate.get('current_stage') == stage:
+                candidates.append(candidate)
+    return candidates
+
+
+def compact_archive(archive_dir, now=None):
+    """Purge candidates whose retention has expired from cold segments
+
+    The purged ids, including merged duplicate ids, are kept in the index
+    with their expiry so a later sync does not store them again.
+    """
+    now = now or _now_ms()
+    archive_dir = Path(archive_dir)
+    with write_lock:
+        index = load_index(archive_dir)
+        expired = {
+            candidate_id: entry['segment']
+            for candidate_id, entry in index['candidates'].items()
+            if entry.get('expiresAt') is not None and entry['expiresAt'] <= now
+        }
+        if not expired:
+            return []
+        for key in set(expired.values()):
+            segment = [
+                c for c in read_segment(archive_dir, key)
+                if c.get('id') not in expired
+            ]
+            write_segment(archive_dir, key, segment)
+        purged = index.setdefault('purged', {})
+        for candidate_id in expired:
+            entry = index['candidates'].pop(candidate_id)
+            for purged_id in [candidate_id] + entry.get('merged_ids', []):
+                purged[purged_id] = entry['expiresAt']
+        _rebuild_segment_counts(index)
+        write_json_atomic(archive_dir / INDEX_FILE, index)
+    return sorted(expired, key=str)
+
+
+def start_compaction(candidates_file, archive_dir,
+                     interval=COMPACTION_INTERVAL):
+    """Enforce retention expiry periodically on a daemon thread
+
+    Each run moves expired candidates out of the hot store and then purges
+    expired records from the cold segments.
+    """
+    def run():
+        while True:
+            try:
+                archive_candidates(
+                    candidates_file, archive_dir, expired_only=True
+                )
+                compact_archive(archive_dir)
+            except Exception as e:
+                print(f"Archive compaction failed: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(
+        target=run, name='archive-compaction', daemon=True
+    )
+    thread.start()
+    return thread
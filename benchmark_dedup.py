@@ -0,0 +1,222 @@
+import argparse
+import random
+import string
+import time
+
+from dedup import deduplicate_candidates
+
+FIRST_NAMES = [
+    'John', 'Emma', 'Michael', 'Sophia', 'Daniel', 'Olivia', 'Ethan',
+    'James', 'Amelia', 'Luca', 'Marco', 'Samantha', 'Andrii', 'Connor',
+    'Li', 'Dmytro', 'Alexander', 'Jonathan',
+]
+LAST_NAMES = [
+    'Doe', 'Johnson', 'Carter', 'Bennett', 'Thompson', 'Reynolds',
+    'Matthews', 'Williams', 'Harrison', 'Foster', 'Richardson', 'Mitchell',
+    'Moretti', 'Rossi', 'Blake', 'Kovalenko', "O'Neill", 'Wei', 'Ivanenko',
+]
+HEADLINES = ['TechCorp', 'FinCorp', 'SalesHub', 'DataWorks', 'CloudNine']
+ACCENTS = {'a': 'á', 'e': 'é', 'i': 'í', 'o': 'ö', 'u': 'ü', 'n': 'ñ', 'c': 'ç'}
+
+# Share of duplicates that only match on name and headline; these should be
+# reported as possible duplicates, never merged
+NAME_ONLY_RATE = 0.2
+
+
+def synthetic_candidate(rng, index):
+    """Build one synthetic candidate with unique contact details"""
+    first = rng.choice(FIRST_NAMES)
+    # A random surname stem keeps distinct people from colliding on name
+    last = rng.choice(LAST_NAMES) + ''.join(
+        rng.choices(string.ascii_lowercase, k=6)
+    )
+    handle = f"{first}.{last}.{index}".lower().replace("'", '')
+    return {
+        'id': f"synthetic-{index}",
+        'name': f"{first} {last}",
+        'headline': rng.choice(HEADLINES),
+        'emails': [f"{handle}@example.com"],
+        'phones': [{'type': 'other', 'value': f"+1{index:010d}"}],
+        'links': [f"https://www.linkedin.com/in/{handle}/"],
+        'updatedAt': 1687363652658 + index,
+    }
+
+
+def name_variant(rng, name):
+    """Spell a name the way another recruiter might have typed it"""
+    first, last = name.split(' ', 1)
+    variant = rng.randrange(3)
+    if variant == 0:
+        # Accent one letter, as on a localised form
+        positions = [i for i, ch in enumerate(last) if ch in ACCENTS]
+        if positions:
+            i = rng.choice(positions)
+            last = last[:i] + ACCENTS[last[i]] + last[i + 1:]
+        return f"{first} {last}"
+    if variant == 1:
+        return f"{last}, {first}"
+    # Swap two adjacent letters in the surname
+    i = rng.randrange(1, len(last) - 1)
+    return f"{first} {last[:i]}{last[i + 1]}{last[i]}{last[i + 2:]}"
+
+
+def synthetic_duplicate(rng, original, index):
+    """Re-key an existing candidate the way a second ATS import would
+
+    Returns the duplicate and whether it shares no contact key with the
+    original.
+    """
+    duplicate = dict(original)
+    duplicate['id'] = f"synthetic-dup-{index}"
+    if rng.random() < 0.5:
+        duplicate['name'] = name_variant(rng, original['name'])
+    if rng.random() < NAME_ONLY_RATE:
+        # Same person re-entered with fresh contact details
+        duplicate['name'] = name_variant(rng, original['name'])
+        duplicate['emails'] = [f"candidate{index}@other.example.com"]
+        duplicate['phones'] = [{'type': 'other', 'value': f"+2{index:010d}"}]
+        duplicate['links'] = []
+        return duplicate, True
+    variant = rng.randrange(3)
+    if variant == 0:
+        duplicate['emails'] = [original['emails'][0].upper()]
+        duplicate['phones'] = []
+        duplicate['links'] = []
+    elif variant == 1:
+        duplicate['emails'] = []
+        duplicate['links'] = [
+            original['links'][0].replace('https://www.', 'http://')
+        ]
+    else:
+        duplicate['emails'] = []
+        duplicate['links'] = []
+        duplicate['phones'] = [{
+            'type': 'work',
+            'value': original['phones'][0]['value'].replace('+', '00'),
+        }]
+    return duplicate, False
+
+
+def generate(count, duplicate_rate, seed):
+    """Generate count records of which roughly duplicate_rate are duplicates
+
+    Returns the records, a map from every record id to the id of the
+    original person it was generated from, which serves as ground truth,
+    and the ids of duplicates that share no contact key with their original.
+    """
+    rng = random.Random(seed)
+    candidates = []
+    originals = []
+    truth = {}
+    name_only = set()
+    for index in range(count):
+        if originals and rng.random() < duplicate_rate:
+            original = originals[rng.randrange(len(originals))]
+            duplicate, shares_no_contact = synthetic_duplicate(
+                rng, original, index
+            )
+            candidates.append(duplicate)
+            truth[duplicate['id']] = original['id']
+            if shares_no_contact:
+                name_only.add(duplicate['id'])
+        else:
+            original = synthetic_candidate(rng, index)
+            originals.append(original)
+            candidates.append(original)
+            truth[original['id']] = original['id']
+    return candidates, truth, name_only
+
+
+def score(report, truth):
+    """Compare merge clusters against ground truth
+
+    A merge is correct when the merged record comes from the same original
+    person as another member of its cluster. Returns correct merges, wrong
+    merges and the number of clusters that hold more than one person.
+    """
+    correct = 0
+    wrong = 0
+    impure = 0
+    for cluster in report['clusters']:
+        people = {}
+        for candidate_id in [cluster['primary_id']] + cluster['merged_ids']:
+            person = truth[candidate_id]
+            people[person] = people.get(person, 0) + 1
+        # Each person's records collapse into one; extra people are errors
+        correct += sum(count - 1 for count in people.values())
+        wrong += len(people) - 1
+        if len(people) > 1:
+            impure += 1
+    return correct, wrong, impure
+
+
+def score_possible(report, truth, name_only):
+    """Compare possible-duplicate pairs against ground truth
+
+    Returns the number of pairs that really are one person and the number
+    of name-only duplicates that appear in at least one such pair.
+    """
+    correct = 0
+    found = set()
+    for pair in report['possible_duplicates']:
+        first, second = pair['ids']
+        if truth[first] == truth[second]:
+            correct += 1
+            found.update(pair['ids'])
+    return correct, len(found & name_only)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark candidate deduplication on synthetic records"
+    )
+    parser.add_argument('--records', type=int, default=1_000_000)
+    parser.add_argument('--duplicate-rate', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    candidates, truth, name_only = generate(
+        args.records, args.duplicate_rate, args.seed
+    )
+    duplicates = len(truth) - len(set(truth.values()))
+    print(
+        f"Generated {len(candidates)} records ({duplicates} duplicates, "
+        f"{len(name_only)} sharing only a name) "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+    start = time.perf_counter()
+    result, report = deduplicate_candidates(candidates)
+    elapsed = time.perf_counter() - start
+    merged = report['input_count'] - report['output_count']
+    print(
+        f"Deduplicated to {len(result)} records in {elapsed:.1f}s "
+        f"({len(report['clusters'])} clusters, {merged} records merged, "
+        f"{len(candidates) / elapsed:,.0f} records/s)"
+    )
+
+    # Name-only duplicates must not be merged, so they are scored separately
+    mergeable = duplicates - len(name_only)
+    correct, wrong, impure = score(report, truth)
+    precision = correct / merged if merged else 1.0
+    recall = correct / mergeable if mergeable else 1.0
+    print(
+        f"Merges: precision {precision:.4f}, recall {recall:.4f} "
+        f"({correct} correct, {wrong} wrong, "
+        f"{impure} clusters with more than one person)"
+    )
+
+    possible = len(report['possible_duplicates'])
+    correct_pairs, found = score_possible(report, truth, name_only)
+    print(
+        f"Possible duplicates: precision "
+        f"{correct_pairs / possible if possible else 1.0:.4f}, recall "
+        f"{found / len(name_only) if name_only else 1.0:.4f} "
+        f"({possible} pairs reported, {correct_pairs} same person, "
+        f"{found} of {len(name_only)} name-only duplicates found)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from urllib.parse import urlsplit
+
+# Emails and profile links identify a person on their own; a shared phone
+# number only merges a pair that also agrees on name. A similar name and
+# headline without any shared contact key is reported, never merged, because
+# the headline is the employer and colleagues often have similar names.
+STRONG_KEYS = ('email', 'link')
+NAME_THRESHOLD = 0.88
+HEADLINE_THRESHOLD = 0.8
+NEIGHBOURHOOD_WINDOW = 5
+
+# Blocks larger than this are shared placeholders (switchboard numbers,
+# company pages) rather than identity signals, so they are not expanded.
+MAX_BLOCK_SIZE = 50
+
+# Fields the recruitment system adds on top of the ATS export. Merging
+# duplicates and upserting export rows must both carry these over.
+LOCAL_FIELDS = (
+    'current_stage',
+    'stage_history',
+    'assessment',
+    'resume_url',
+    'job_applied',
+    'merged_ids',
+)
+
+GMAIL_DOMAINS = {'gmail.com', 'googlemail.com'}
+LINK_HOST_PREFIXES = ('www.', 'm.', 'mobile.')
+
+
+def normalize_email(email):
+    """Normalise an email address to a comparable key"""
+    if not isinstance(email, str) or '@' not in email:
+        return None
+    local, _, domain = email.strip().lower().rpartition('@')
+    local = local.split('+', 1)[0]
+    if domain in GMAIL_DOMAINS:
+        local = local.replace('.', '')
+        domain = 'gmail.com'
+    if not local or not domain:
+        return None
+    return f"{local}@{domain}"
+
+
+def normalize_phone(phone, default_country_code=None):
+    """Normalise a phone number to E.164, or None if it cannot be"""
+    if isinstance(phone, dict):
+        phone = phone.get('value')
+    if not isinstance(phone, str):
+        return None
+    phone = phone.strip()
+    digits = re.sub(r'\D', '', phone)
+    if phone.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    elif default_country_code:
+        digits = str(default_country_code).lstrip('+') + digits.lstrip('0')
+    else:
+        return None
+    if not 8 <= len(digits) <= 15 or digits.startswith('0'):
+        return None
+    return f"+{digits}"
+
+
+def normalize_link(link):
+    """Normalise a profile link to host + path, dropping scheme and query"""
+    if not isinstance(link, str) or not link.strip():
+        return None
+    link = link.strip()
+    if '://' not in link:
+        link = f"https://{link}"
+    parts = urlsplit(link.lower())
+    host = parts.hostname or ''
+    for prefix in LINK_HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    path = parts.path.rstrip('/')
+    # A bare domain is a company site, not a person
+    if not host or not path:
+        return None
+    return f"{host}{path}"
+
+
+def normalize_name(name):
+    """Normalise a name to lower-case ASCII tokens in sorted order"""
+    if not isinstance(name, str):
+        return ''
+    name = unicodedata.normalize('NFKD', name)
+    name = name.encode('ascii', 'ignore').decode('ascii').lower()
+    return ' '.join(sorted(re.findall(r'[a-z0-9]+', name)))
+
+
+def similarity(a, b, threshold=0.0, matcher=None):
+    """Return a 0-1 similarity ratio, or 0.0 early if below threshold
+
+    A matcher already primed with b as its second sequence can be passed
+    in to skip re-indexing b when it is compared against many strings.
+    """
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    if 2.0 * min(len(a), len(b)) / (len(a) + len(b)) < threshold:
+        return 0.0
+    if matcher is None:
+        matcher = SequenceMatcher(None, a, b)
+    else:
+        matcher.set_seq1(a)
+    if matcher.quick_ratio() < threshold:
+        return 0.0
+    return matcher.ratio()
+
+
+def blocking_keys(candidate, default_country_code=None):
+    """Yield (kind, key) blocking keys for a candidate record"""
+    for email in candidate.get('emails') or []:
+        key = normalize_email(email)
+        if key:
+            yield 'email', key
+    for phone in candidate.get('phones') or []:
+        key = normalize_phone(phone, default_country_code)
+        if key:
+            yield 'phone', key
+    for link in candidate.get('links') or []:
+        key = normalize_link(link)
+        if key:
+            yield 'link', key
+
+
+class _DisjointSet:
+    """Union-find over record positions with path halving"""
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        if root_b < root_a:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        return True
+
+
+def find_duplicate_clusters(candidates, default_country_code=None,
+                            window=NEIGHBOURHOOD_WINDOW):
+    """Group candidate positions that describe the same person
+
+    Uses normalised-key blocking on emails, phones and links plus a
+    sorted-neighbourhood passes over name and headline, so the cost stays
+    close to linear in the number of records. Returns (clusters, possible):
+    clusters is a list of (positions, reasons) tuples for every cluster with
+    more than one record, and possible lists (first, second, reason) pairs
+    that only matched on name and headline and were left unmerged.
+    """
+    size = len(candidates)
+    disjoint = _DisjointSet(size)
+    names = [normalize_name(c.get('name')) for c in candidates]
+    reasons = {}
+
+    def is_same_name(a, b, matcher=None):
+        score = similarity(names[b], names[a], NAME_THRESHOLD, matcher)
+        return score >= NAME_THRESHOLD
+
+    def link(a, b, reason):
+        if disjoint.union(a, b):
+            reasons.setdefault(min(a, b), []).append(
+                (max(a, b), reason)
+            )
+
+    blocks = {}
+    for position, candidate in enumerate(candidates):
+        for kind, key in blocking_keys(candidate, default_country_code):
+            members = blocks.setdefault((kind, key), [])
+            if not members or members[-1] != position:
+                members.append(position)
+
+    for (kind, key), members in blocks.items():
+        if len(members) < 2 or len(members) > MAX_BLOCK_SIZE:
+            continue
+        if kind in STRONG_KEYS:
+            for other in members[1:]:
+                link(members[0], other, f"{kind}:{key}")
+            continue
+        for i, first in enumerate(members):
+            matcher = SequenceMatcher(None, b=names[first])
+            for second in members[i + 1:]:
+                if is_same_name(first, second, matcher):
+                    link(first, second, f"{kind}:{key}")
+
+    headlines = [
+        normalize_name(c.get('headline')) for c in candidates
+    ]
+    possible = []
+    seen = set()
+    # A second pass on the reversed name catches typos early in the name,
+    # which move a record away from its duplicate in plain sorted order
+    sort_keys = (names.__getitem__, lambda position: names[position][::-1])
+    for sort_key in sort_keys:
+        order = sorted(range(size), key=sort_key)
+        for i, first in enumerate(order):
+            if not names[first]:
+                continue
+            matcher = SequenceMatcher(None, b=names[first])
+            for second in order[i + 1:i + window]:
+                pair = (min(first, second), max(first, second))
+                if pair in seen or not is_same_name(first, second, matcher):
+                    continue
+                headline_score = similarity(
+                    headlines[first], headlines[second], HEADLINE_THRESHOLD
+                )
+                # Pairs sharing a contact key are already in one cluster
+                if (headline_score >= HEADLINE_THRESHOLD
+                        and disjoint.find(first) != disjoint.find(second)):
+                    seen.add(pair)
+                    possible.append(pair + (f"name:{names[first]}",))
+
+    clusters = {}
+    for position in range(size):
+        clusters.setdefault(disjoint.find(position), []).append(position)
+
+    result = []
+    for positions in clusters.values():
+        if len(positions) < 2:
+            continue
+        cluster_reasons = []
+        for position in positions:
+            cluster_reasons.extend(
+                reason for _, reason in reasons.get(position, [])
+            )
+        result.append((positions, sorted(set(cluster_reasons))))
+    return result, possible
+
+
+def _merge_list(target, values):
+    """Append values to target that are not already present"""
+    for value in values or []:
+        if value not in target:
+            target.append(value)
+
+
+def merge_cluster(records):
+    """Merge duplicate records into one, keeping the most recently updated"""
+    ordered = sorted(
+        records, key=lambda c: c.get('updatedAt') or 0, reverse=True
+    )
+    merged = dict(ordered[0])
+    for field in ('emails', 'phones', 'links', 'tags', 'sources'):
+        values = list(merged.get(field) or [])
+        for record in ordered[1:]:
+            _merge_list(values, record.get(field))
+        merged[field] = values
+
+    # Keep recruiter work done against any of the duplicates; history and
+    # merged ids are combined below rather than taken from one record
+    for record in ordered[1:]:
+        for field in LOCAL_FIELDS:
+            if field in ('stage_history', 'merged_ids'):
+                continue
+            if not merged.get(field) and record.get(field):
+                merged[field] = record[field]
+    history = []
+    for record in ordered:
+        _merge_list(history, record.get('stage_history'))
+    if history:
+        merged['stage_history'] = sorted(
+            history, key=lambda entry: entry.get('timestamp', '')
+        )
+        # The latest transition wins, whichever duplicate it was made on
+        if merged['stage_history'][-1].get('stage'):
+            merged['current_stage'] = merged['stage_history'][-1]['stage']
+
+    merged_ids = list(merged.get('merged_ids') or [])
+    for record in ordered[1:]:
+        _merge_list(merged_ids, [record.get('id')])
+        _merge_list(merged_ids, record.get('merged_ids'))
+    merged['merged_ids'] = merged_ids
+    return merged
+
+
+def deduplicate_candidates(candidates, default_country_code=None):
+    """Merge duplicate candidates and return (candidates, report)"""
+    clusters, possible = find_duplicate_clusters(
+        candidates, default_country_code
+    )
+    replaced = {}
+    report_clusters = []
+    for positions, reasons in clusters:
+        records = [candidates[position] for position in positions]
+        merged = merge_cluster(records)
+        replaced[positions[0]] = merged
+        for position in positions[1:]:
+            replaced[position] = None
+        report_clusters.append({
+            'primary_id': merged.get('id'),
+            'merged_ids': [
+                r.get('id') for r in records if r.get('id') != merged.get('id')
+            ],
+            'names': [r.get('name') for r in records],
+            'reasons': reasons,
+        })
+
+    result = []
+    for position, candidate in enumerate(candidates):
+        if position in replaced:
+            if replaced[position] is not None:
+                result.append(replaced[position])
+        else:
+            result.append(candidate)
+
+    report = {
+        'input_count': len(candidates),
+        'output_count': len(result),
+        'clusters': report_clusters,
+        'possible_duplicates': [
+            {
+                'ids': [candidates[first].get('id'), candidates[second].get('id')],
+                'names': [
+                    candidates[first].get('name'), candidates[second].get('name')
+                ],
+                'reason': reason,
+            }
+            for first, second, reason in possible
+        ],
+    }
+    return result, report
+
+
+def deduplicate_payload(data, default_country_code=None):
+    """Deduplicate a candidates payload in either dict or list form"""
+    if isinstance(data, dict) and isinstance(data.get('candidates'), list):
+        candidates, report = deduplicate_candidates(
+            data['candidates'], default_country_code
+        )
+        return {**data, 'candidates': candidates}, report
+    if isinstance(data, list):
+        return deduplicate_candidates(data, default_country_code)
+    return data, None
+
+
+def format_report(report):
+    """Render a deduplication report as printable lines"""
+    lines = [
+        f"Deduplicated {report['input_count']} candidates into "
+        f"{report['output_count']} "
+        f"({len(report['clusters'])} merge clusters)"
+    ]
+    for cluster in report['clusters']:
+        lines.append(
+            f"  {cluster['primary_id']} <- {', '.join(map(str, cluster['merged_ids']))}"
+            f" [{'; '.join(cluster['reasons'])}]"
+        )
+    possible = report.get('possible_duplicates') or []
+    if possible:
+        lines.append(
+            f"{len(possible)} possible duplicate pair(s) left unmerged "
+            f"(similar name and headline, no shared contact):"
+        )
+        for pair in possible:
+            lines.append(
+                f"  {' / '.join(map(str, pair['ids']))} "
+                f"({' / '.join(map(str, pair['names']))})"
+            )
+    return lines
@@ -1,28 +1,18 @@
+import argparse
 import json
 from pathlib import Path
 
+from archive import archive_candidates, compact_archive
+from dedup import deduplicate_payload, format_report
+from storage import read_json_file
+from sync import delta_sync, format_summary
+
 def ensure_data_directory():
     """Create data directory if it doesn't exist"""
     data_dir = Path('data')
     data_dir.mkdir(exist_ok=True)
     return data_dir
 
-def read_json_file(file_path):
-    """Try reading JSON file with different encodings"""
-    encodings = ['utf-8', 'utf-8-sig', 'latin1', 'cp1252']
-    
-    for encoding in encodings:
-        try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                return json.load(f)
-        except UnicodeDecodeError:
-            continue
-        except json.JSONDecodeError as e:
-            print(f"Error decoding JSON with {encoding} encoding: {e}")
-            continue
-    
-    raise ValueError(f"Could not read {file_path} with any of the attempted encodings")
-
 def convert_json_encoding():
     """Convert existing JSON files to proper UTF-8 encoding"""
     data_dir = ensure_data_directory()
@@ -42,6 +32,12 @@ def convert_json_encoding():
         candidates_file = data_dir / 'candidates.json'
         candidates_data = read_json_file(candidates_file)
         
+        # Merge duplicate candidates before they reach the UI
+        candidates_data, report = deduplicate_payload(candidates_data)
+        if report:
+            for line in format_report(report):
+                print(line)
+        
         with open(candidates_file, 'w', encoding='utf-8') as f:
             json.dump(candidates_data, f, ensure_ascii=False, indent=2)
         print(f"Successfully converted {candidates_file} to UTF-8")
@@ -58,9 +54,86 @@ def convert_json_encoding():
         print(f"Unexpected error: {e}")
         return False
 
+def sync_candidates(export_path):
+    """Apply a delta sync from an ATS export file or chunk directory"""
+    data_dir = ensure_data_directory()
+    
+    try:
+        summary = delta_sync(
+            data_dir / 'candidates.json',
+            export_path,
+            data_dir / 'sync_state.json',
+            data_dir / 'archive'
+        )
+        for line in format_summary(summary):
+            print(line)
+        return not summary['conflict']
+    except FileNotFoundError as e:
+        print(f"Error: File not found - {e}")
+        return False
+    except ValueError as e:
+        print(f"Error: {e}")
+        return False
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return False
+
+def archive_closed_candidates(compact=False):
+    """Move closed candidates to cold storage and purge expired records"""
+    data_dir = ensure_data_directory()
+    archive_dir = data_dir / 'archive'
+    
+    try:
+        summary = archive_candidates(data_dir / 'candidates.json', archive_dir)
+        for key, ids in summary['archived'].items():
+            print(f"Archived {len(ids)} candidate(s) to segment {key}")
+        print(f"{summary['hot_count']} active candidate(s) remain in the hot store")
+        
+        if compact:
+            purged = compact_archive(archive_dir)
+            print(f"Purged {len(purged)} candidate(s) past retention expiry")
+        return True
+    except FileNotFoundError as e:
+        print(f"Error: File not found - {e}")
+        return False
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return False
+
 if __name__ == "__main__":
-    success = convert_json_encoding()
-    if success:
-        print("JSON files converted successfully")
+    parser = argparse.ArgumentParser(description="Import recruitment data")
+    parser.add_argument(
+        '--delta',
+        metavar='EXPORT_PATH',
+        help="upsert candidates changed since the last sync from an export "
+             "file or a directory of export chunks"
+    )
+    parser.add_argument(
+        '--archive',
+        action='store_true',
+        help="move hired, rejected, archived and expired candidates into "
+             "compressed monthly segments under data/archive"
+    )
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help="with --archive, also purge archived candidates past retention"
+    )
+    args = parser.parse_args()
+    
+    if args.archive:
+        if archive_closed_candidates(compact=args.compact):
+            print("Archival completed successfully")
+        else:
+            print("Failed to archive candidates. Please check the error messages above.")
+    elif args.delta:
+        if sync_candidates(args.delta):
+            print("Delta sync completed successfully")
+        else:
+            print("Failed to sync candidates. Please check the error messages above.")
     else:
-        print("Failed to convert JSON files. Please check the error messages above.") 
\ No newline at end of file
+        success = convert_json_encoding()
+        if success:
+            print("JSON files converted successfully")
+        else:
+            print("Failed to convert JSON files. Please check the error messages above.") 
\ No newline at end of file
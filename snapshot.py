@@ -0,0 +1,117 @@
+import copy
+import os
+import threading
+from types import MappingProxyType
+
+
+class DataSnapshot:
+    """One immutable, versioned view of the data files shared by all sessions
+
+    The parsed payloads are shared by reference, so callers must treat them
+    as read-only and go through a SessionOverlay to make changes.
+    """
+
+    def __init__(self, version, data, signature):
+        self.version = version
+        self.data = MappingProxyType(data)
+        self.signature = signature
+
+
+def file_signature(paths):
+    """Return (mtime_ns, size) per file, used to detect changes on disk"""
+    signature = {}
+    for name, path in paths.items():
+        try:
+            stat = os.stat(path)
+            signature[name] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature[name] = None
+    return signature
+
+
+class SnapshotStore:
+    """Holds the current DataSnapshot once per process
+
+    current() only stats the files; they are re-parsed when their mtime or
+    size changes, and the new snapshot replaces the old one in a single
+    reference assignment so readers never see a half-loaded version.
+    """
+
+    def __init__(self, paths, loader):
+        self.paths = dict(paths)
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._snapshot = DataSnapshot(0, {}, None)
+
+    def current(self):
+        """Return the latest snapshot, reloading if the files changed"""
+        snapshot = self._snapshot
+        if file_signature(self.paths) == snapshot.signature:
+            return snapshot
+        with self._lock:
+            # Another session may have reloaded while we waited
+            snapshot = self._snapshot
+            signature = file_signature(self.paths)
+            if signature == snapshot.signature:
+                return snapshot
+            previous = snapshot.signature or {}
+            data = {}
+            for name, path in self.paths.items():
+                # Files that did not change keep their already parsed payload
+                if previous.get(name) == signature[name] and name in snapshot.data:
+                    data[name] = snapshot.data[name]
+                    continue
+                data[name] = self.loader(path)
+                if data[name] is None:
+                    # Keep serving the last good version and retry next time
+                    return snapshot if snapshot.version else DataSnapshot(
+                        0, data, None
+                    )
+            self._snapshot = DataSnapshot(snapshot.version + 1, data, signature)
+            return self._snapshot
+
+
+class SessionOverlay:
+    """Per-session copy-on-write edits layered over a shared snapshot
+
+    Edited candidates are deep-copied into the overlay so the shared
+    snapshot is never mutated. Edits are dropped once a newer snapshot,
+    which already contains them on disk, becomes current.
+    """
+
+    def __init__(self):
+        self.base_version = None
+        self.candidates = {}
+
+    def edit(self, snapshot, candidate_id):
+        """Return a private, mutable copy of a candidate"""
+        self._rebase(snapshot)
+        if candidate_id not in self.candidates:
+            for candidate in snapshot.data['candidates']['candidates']:
+                if candidate.get('id') == candidate_id:
+                    self.candidates[candidate_id] = copy.deepcopy(candidate)
+                    break
+            else:
+                return None
+        return self.candidates[candidate_id]
+
+    def view(self, snapshot):
+        """Return the candidates payload with this session's edits applied"""
+        self._rebase(snapshot)
+        payload = snapshot.data.get('candidates')
+        if not self.candidates or not payload:
+            return payload
+        return {
+            **payload,
+            'candidates': [
+                self.candidates.get(candidate.get('id'), candidate)
+                for candidate in payload['candidates']
+            ],
+        }
+
+    def _rebase(self, snapshot):
+        if self.base_version is None:
+            self.base_version = snapshot.version
+        elif snapshot.version > self.base_version:
+            self.candidates.clear()
+            self.base_version = snapshot.version
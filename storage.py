@@ -0,0 +1,35 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+# Held by every read-modify-write of the data files (stage transitions,
+# delta sync, archival) so one writer never overwrites another's changes.
+# Re-entrant because those paths call each other while holding it.
+write_lock = threading.RLock()
+
+
+def read_json_file(file_path):
+    """Try reading JSON file with different encodings"""
+    encodings = ['utf-8', 'utf-8-sig', 'latin1', 'cp1252']
+    
+    for encoding in encodings:
+        try:
+            with open(file_path, 'r', encoding=encoding) as f:
+                return json.load(f)
+        except UnicodeDecodeError:
+            continue
+        except json.JSONDecodeError as e:
+            print(f"Error decoding JSON with {encoding} encoding: {e}")
+            continue
+    
+    raise ValueError(f"Could not read {file_path} with any of the attempted encodings")
+
+
+def write_json_atomic(file_path, data):
+    """Write JSON to a temporary file and swap it into place"""
+    file_path = Path(file_path)
+    temp_path = file_path.with_name(f".{file_path.name}.tmp")
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, file_path)
@@ -0,0 +1,205 @@
+import json
+import os
+from pathlib import Path
+
+from archive import (
+    archived_ids, is_purged, load_index, remove_archived, update_archived,
+)
+from dedup import LOCAL_FIELDS, merge_cluster
+from storage import read_json_file, write_json_atomic, write_lock
+
+def load_sync_state(state_file):
+    """Load the sync watermark and processed chunk list"""
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        state = {}
+    state.setdefault('watermark', 0)
+    state.setdefault('chunks', {})
+    return state
+
+
+def _records(data):
+    """Return the candidate list from an export in dict or list form"""
+    if isinstance(data, dict):
+        return data.get('candidates') or []
+    return data or []
+
+
+def pending_chunks(export_path, state):
+    """List export files that have not been synced since they last changed"""
+    export_path = Path(export_path)
+    if export_path.is_dir():
+        files = sorted(export_path.glob('*.json'))
+    else:
+        files = [export_path]
+    pending = []
+    for file_path in files:
+        mtime = file_path.stat().st_mtime_ns
+        if state['chunks'].get(file_path.name) != mtime:
+            pending.append((file_path, mtime))
+    return pending
+
+
+def upsert_candidate(existing, record):
+    """Return the export record with locally added fields carried over
+
+    When existing is the survivor of a deduplication merge, the record
+    (for the survivor itself or for one of its merged_ids) is merged back
+    in, keeping the surviving id and the combined contact lists rather
+    than replacing the survivor.
+    """
+    if existing.get('merged_ids') or record.get('id') != existing.get('id'):
+        updated = merge_cluster([existing, record])
+        updated['id'] = existing.get('id')
+        updated['merged_ids'] = [
+            merged_id for merged_id in updated['merged_ids']
+            if merged_id != existing.get('id')
+        ]
+    else:
+        updated = dict(record)
+    for field in LOCAL_FIELDS:
+        if field in existing and field not in updated:
+            updated[field] = existing[field]
+    return updated
+
+
+def delta_sync(candidates_file, export_path, state_file, archive_dir=None):
+    """Upsert candidates changed since the watermark and return a summary
+
+    export_path is a single export file or a directory of export chunks.
+    Chunks whose modification time matches the last sync are not re-read,
+    and records with updatedAt at or below the watermark are skipped, so
+    the cost follows the size of the change rather than the pool.
+    Records for candidates already moved to archive_dir are updated in
+    their cold segment instead of being re-inserted into the hot store,
+    and records for candidates purged at retention expiry are dropped.
+    """
+    # The whole read-merge-write runs under the shared writer lock so a
+    # stage change saved by another session cannot be overwritten
+    with write_lock:
+        return _delta_sync(candidates_file, export_path, state_file, archive_dir)
+
+
+def _delta_sync(candidates_file, export_path, state_file, archive_dir):
+    """Apply a delta sync; callers must hold storage.write_lock"""
+    state = load_sync_state(state_file)
+    watermark = state['watermark']
+    summary = {
+        'chunks': 0,
+        'scanned': 0,
+        'skipped': 0,
+        'inserted': [],
+        'updated': [],
+        'unchanged': 0,
+        'purged': 0,
+        'archived_updated': [],
+        'restored': [],
+        'conflict': False,
+        'watermark_before': watermark,
+        'watermark_after': watermark,
+    }
+
+    chunks = pending_chunks(export_path, state)
+    if not chunks:
+        return summary
+
+    read_mtime = os.stat(candidates_file).st_mtime_ns
+    store = read_json_file(candidates_file)
+    candidates = _records(store)
+    index = {}
+    for position, candidate in enumerate(candidates):
+        index[candidate.get('id')] = position
+        for merged_id in candidate.get('merged_ids') or []:
+            index.setdefault(merged_id, position)
+    archive_index = load_index(archive_dir) if archive_dir else {}
+    archived = archived_ids(archive_index) if archive_dir else {}
+    archived_records = {}
+
+    new_watermark = watermark
+    for file_path, mtime in chunks:
+        summary['chunks'] += 1
+        for record in _records(read_json_file(file_path)):
+            summary['scanned'] += 1
+            updated_at = record.get('updatedAt')
+            if updated_at is not None and updated_at <= watermark:
+                summary['skipped'] += 1
+                continue
+            if updated_at is not None:
+                new_watermark = max(new_watermark, updated_at)
+            if is_purged(archive_index, record):
+                summary['purged'] += 1
+                continue
+
+            position = index.get(record.get('id'))
+            if position is None and record.get('id') in archived:
+                owner = archived[record.get('id')]
+                archived_records.setdefault(owner, []).append(record)
+                continue
+            if position is None:
+                index[record.get('id')] = len(candidates)
+                candidates.append(dict(record))
+                summary['inserted'].append(record.get('id'))
+                continue
+            merged = upsert_candidate(candidates[position], record)
+            if merged == candidates[position]:
+                summary['unchanged'] += 1
+                continue
+            candidates[position] = merged
+            summary['updated'].append(record.get('id'))
+        state['chunks'][file_path.name] = mtime
+
+    if archived_records:
+        changed, reopened = update_archived(
+            archive_dir, archived_records, upsert_candidate
+        )
+        # Reopened pipelines go back to the hot store so the UI sees them
+        for candidate in reopened:
+            candidates.append(candidate)
+            summary['restored'].append(candidate.get('id'))
+        summary['archived_updated'] = changed
+        summary['unchanged'] += sum(
+            len(records) for owner, records in archived_records.items()
+            if owner not in changed and owner not in summary['restored']
+        )
+
+    if summary['inserted'] or summary['updated'] or summary['restored']:
+        # Another process (e.g. a CLI run) may have written meanwhile; keep
+        # its changes and leave the watermark so the next sync retries
+        if os.stat(candidates_file).st_mtime_ns != read_mtime:
+            summary['conflict'] = True
+            return summary
+        if isinstance(store, dict):
+            store['candidates'] = candidates
+        else:
+            store = {'candidates': candidates}
+        write_json_atomic(candidates_file, store)
+        if summary['restored']:
+            remove_archived(archive_dir, summary['restored'])
+
+    state['watermark'] = new_watermark
+    summary['watermark_after'] = new_watermark
+    write_json_atomic(state_file, state)
+    return summary
+
+
+def format_summary(summary):
+    """Render a delta-sync summary as printable lines"""
+    if summary.get('conflict'):
+        return [
+            "candidates.json changed during the sync; nothing was written, "
+            "run the sync again"
+        ]
+    return [
+        f"Synced {summary['chunks']} export chunk(s): "
+        f"{summary['scanned']} scanned, {summary['skipped']} older than "
+        f"watermark, {len(summary['inserted'])} inserted, "
+        f"{len(summary['updated'])} updated, "
+        f"{len(summary['archived_updated'])} archived updated, "
+        f"{len(summary['restored'])} restored from archive, "
+        f"{summary['purged']} purged at expiry, "
+        f"{summary['unchanged']} unchanged",
+        f"Watermark {summary['watermark_before']} -> "
+        f"{summary['watermark_after']}",
+    ]
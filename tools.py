@@ -8,6 +8,10 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 from dotenv import load_dotenv
+from dedup import deduplicate_payload
+from storage import write_json_atomic, write_lock
+from sync import delta_sync
+from archive import archive_candidates, load_archived, start_compaction
 
 # Load environment variables
 load_dotenv()
@@ -221,11 +225,19 @@ class CommunicationAgent:
 
 class DataAgent:
     @staticmethod
-    def perceive_data(file_path):
-        """Perceive and load data from JSON file"""
+    def perceive_data(file_path, deduplicate=False):
+        """Perceive and load data from JSON file
+
+        With deduplicate, duplicate candidates are merged in the returned
+        payload only; callers that persist the data must leave it off.
+        """
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                data = json.load(f)
+            if deduplicate:
+                # Candidate payloads are merged; postings pass through as-is
+                data, _ = deduplicate_payload(data)
+            return data
         except FileNotFoundError:
             st.error(f"File not found: {file_path}")
             st.info(
@@ -239,12 +251,46 @@ class DataAgent:
             st.error(f"Unexpected error perceiving data: {e}")
             return None
 
+    @staticmethod
+    def synchronize_data(file_path, export_path, state_path, archive_dir=None):
+        """Upsert records changed in an ATS export since the last sync"""
+        try:
+            return delta_sync(file_path, export_path, state_path, archive_dir)
+        except Exception as e:
+            st.error(f"Error synchronizing data: {e}")
+            return None
+
+    @staticmethod
+    def archive_data(file_path, archive_dir):
+        """Move closed and expired candidates into cold archive segments"""
+        try:
+            return archive_candidates(file_path, archive_dir)
+        except Exception as e:
+            st.error(f"Error archiving candidates: {e}")
+            return None
+
+    @staticmethod
+    def perceive_archive(archive_dir, stage=None):
+        """Load archived candidates, optionally limited to one stage"""
+        try:
+            return load_archived(archive_dir, stage)
+        except Exception as e:
+            st.error(f"Error perceiving archived data: {e}")
+            return []
+
+    @staticmethod
+    def start_compaction(file_path, archive_dir):
+        """Start the background job that enforces retention expiry"""
+        return start_compaction(file_path, archive_dir)
+
     @staticmethod
     def persist_state(file_path, data):
         """Persist state to JSON file"""
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            # Replace the file in one step so the shared snapshot never
+            # reloads a half-written file
+            with write_lock:
+                write_json_atomic(file_path, data)
             return True
         except Exception as e:
             st.error(f"Error persisting state: {e}")
@@ -298,33 +344,38 @@ class WorkflowAgent:
     def transition_candidate(candidate_id, new_stage):
         """Transition candidate to new stage"""
         try:
-            candidates = DataAgent.perceive_data('data/candidates.json')
-            if not candidates:
-                return False
+            # Re-read and write under the lock so concurrent writers
+            # (other sessions, delta sync, archival) cannot interleave
+            with write_lock:
+                candidates = DataAgent.perceive_data(
+                    'data/candidates.json', deduplicate=False
+                )
+                if not candidates:
+                    return False
                 
-            # Handle both dictionary and list data structures
-            if isinstance(candidates, dict) and 'candidates' in candidates:
-                candidate_list = candidates['candidates']
-            else:
-                candidate_list = candidates
+                # Handle both dictionary and list data structures
+                if isinstance(candidates, dict) and 'candidates' in candidates:
+                    candidate_list = candidates['candidates']
+                else:
+                    candidate_list = candidates
                 
-            # Find the candidate in the list
-            for candidate in candidate_list:
-                if candidate['id'] == candidate_id:
-                    candidate['current_stage'] = new_stage
-                    candidate['stage_history'] = candidate.get('stage_history', [])
-                    candidate['stage_history'].append({
-                        'stage': new_stage,
-                        'timestamp': datetime.now().isoformat(),
-                    })
+                # Find the candidate in the list
+                for candidate in candidate_list:
+                    if candidate['id'] == candidate_id:
+                        candidate['current_stage'] = new_stage
+                        candidate['stage_history'] = candidate.get('stage_history', [])
+                        candidate['stage_history'].append({
+                            'stage': new_stage,
+                            'timestamp': datetime.now().isoformat(),
+                        })
                     
-                    # Save the updated data
-                    if isinstance(candidates, dict):
-                        return DataAgent.persist_state('data/candidates.json', candidates)
-                    else:
-                        return DataAgent.persist_state('data/candidates.json', {'candidates': candidate_list})
+                        # Save the updated data
+                        if isinstance(candidates, dict):
+                            return DataAgent.persist_state('data/candidates.json', candidates)
+                        else:
+                            return DataAgent.persist_state('data/candidates.json', {'candidates': candidate_list})
                         
-            return False
+                return False
         except Exception as e:
             st.error(f"Error transitioning candidate: {e}")
             return False
@@ -333,7 +384,9 @@ class WorkflowAgent:
     def process_candidate(candidate_id):
         """Process candidate through workflow"""
         try:
-            candidates = DataAgent.perceive_data('data/candidates.json')
+            candidates = DataAgent.perceive_data(
+                'data/candidates.json', deduplicate=False
+            )
             if not candidates:
                 return False
                 